@@ -1,6 +1,7 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request
 from flask_cors import CORS
 import os
+import math
 import difflib
 import pandas as pd
 from dotenv import load_dotenv
@@ -9,6 +10,9 @@ from routes.auth_routes import auth
 from database.db import get_db_connection
 from database.db_utils import add_search_history, get_recent_searches
 import utils.data_manager as dm
+from utils.responses import json_response, cached_json_response
+from utils.neighbors import build_filter_mask, top_k
+from utils.sharding import coordinator_from_env, ShardTimeout
 from flask_cors import CORS
 
 load_dotenv()
@@ -52,6 +56,10 @@ def init_app():
 
 init_app()
 
+# Optional sharded neighbor search (SHARD_COUNT / SHARD_ADDRESSES); in that
+# mode dm.load_all_data() leaves the similarity matrix to the shard workers
+shard_coordinator = coordinator_from_env()
+
 app.register_blueprint(auth, url_prefix="/api")
 
 # ==============================
@@ -59,10 +67,36 @@ app.register_blueprint(auth, url_prefix="/api")
 # ==============================
 
 def success_response(data, status=200):
-    return jsonify({"success": True, "data": data, "error": None}), status
+    return json_response({"success": True, "data": data, "error": None}, status)
+
+def cached_success_response(key, build_data, should_cache=None, precompress=False):
+    """Success response for payloads that only depend on the loaded data (encoded once)."""
+    return cached_json_response(
+        key,
+        lambda: {"success": True, "data": build_data(), "error": None},
+        should_cache=(lambda payload: should_cache(payload["data"])) if should_cache else None,
+        precompress=precompress
+    )
 
 def error_response(message, status=400):
-    return jsonify({"success": False, "data": None, "error": message}), status
+    return json_response({"success": False, "data": None, "error": message}, status)
+
+def _nearest(movie_index, k, filters=None):
+    """Top-k neighbor positions for a movie, via the shard workers when sharding is enabled."""
+    if shard_coordinator is not None:
+        return shard_coordinator.search(movie_index, k, filters)
+    mask = build_filter_mask(dm.ratings, dm.votes, dm.years, **(filters or {}))
+    return top_k(dm.similarity[movie_index], k, mask=mask, exclude=movie_index)
+
+def _optional_arg(name, cast):
+    value = request.args.get(name)
+    if value is None or value.strip() == "":
+        return None
+    value = cast(value)
+    # float() accepts "nan"/"inf", which would match nothing and never hit the cache
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"{name} must be finite")
+    return value
 
 # ==============================
 # Routes
@@ -78,6 +112,16 @@ def recommend():
     if not movie_name:
         return error_response("Movie parameter is required", 400)
 
+    try:
+        filters = {
+            "min_rating": _optional_arg("min_rating", float),
+            "min_votes": _optional_arg("min_votes", int),
+            "min_year": _optional_arg("min_year", int),
+            "max_year": _optional_arg("max_year", int),
+        }
+    except ValueError:
+        return error_response("min_rating, min_votes, min_year and max_year must be numbers", 400)
+
     movie_name = movie_name.lower()
     all_titles = dm.movies["title"].tolist()
     closest_matches = difflib.get_close_matches(movie_name, all_titles, n=1, cutoff=0.6)
@@ -86,13 +130,31 @@ def recommend():
         return error_response("Movie not found", 404)
 
     matched_title = closest_matches[0]
+    cache_key = ("recommend", matched_title) + tuple(filters.values())
+    # Partial shard answers are served but not cached; the flag stays out of the payload
+    outcome = {}
+
+    def build_data():
+        data, outcome["partial"] = _build_recommendation(matched_title, filters)
+        return data
+
+    try:
+        return cached_success_response(
+            cache_key,
+            build_data,
+            should_cache=lambda data: not outcome["partial"]
+        )
+    except ShardTimeout:
+        return error_response("Recommendation service timed out", 503)
+
+def _build_recommendation(matched_title, filters):
+    """Recommendation payload, plus whether it came from only some of the shards."""
     movie_index = dm.movies[dm.movies["title"] == matched_title].index[0]
-    distances = dm.similarity[movie_index]
-    movie_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:11]
+    neighbors = _nearest(movie_index, 10, filters)
 
     recommendations = []
-    for i in movie_list:
-        movie = dm.movies.iloc[i[0]]
+    for i in neighbors:
+        movie = dm.movies.iloc[i]
         mid = int(movie.movie_id)
         metadata = dm.get_movie_metadata(mid)
         recommendations.append({
@@ -111,7 +173,7 @@ def recommend():
     searched_mid = int(searched_movie_data["movie_id"]) if not pd.isna(searched_movie_data["movie_id"]) else 0
     metadata = dm.get_movie_metadata(searched_mid)
 
-    return success_response({
+    return {
         "searched_movie": matched_title,
         "searched_genres": metadata["genres"],
         "searched_year": metadata["release_year"],
@@ -121,10 +183,13 @@ def recommend():
         "searched_votes": int(searched_movie_data["vote_count"]),
         "searched_movie_id": searched_mid,
         "recommendations": recommendations
-    })
+    }, getattr(neighbors, "partial", False)
 
 @app.route("/api/movies/popular", methods=["GET"])
 def get_popular_movies():
+    return cached_success_response("movies:popular", _build_popular_movies, precompress=True)
+
+def _build_popular_movies():
     top_popular = dm.movies.sort_values(by="vote_count", ascending=False).head(20)
     results = []
     for _, movie in top_popular.iterrows():
@@ -138,10 +203,13 @@ def get_popular_movies():
             "genres": metadata["genres"],
             "release_year": metadata["release_year"]
         })
-    return success_response(results)
+    return results
 
 @app.route("/api/movies/recent", methods=["GET"])
 def get_recent_movies():
+    return cached_success_response("movies:recent", _build_recent_movies, precompress=True)
+
+def _build_recent_movies():
     movie_list = []
     for _, movie in dm.movies.iterrows():
         mid = int(movie.movie_id) if not pd.isna(movie.movie_id) else 0
@@ -155,7 +223,35 @@ def get_recent_movies():
             "release_year": metadata["release_year"]
         })
     sorted_movies = sorted(movie_list, key=lambda x: (x["release_year"], x["rating"]), reverse=True)
-    return success_response(sorted_movies[:20])
+    return sorted_movies[:20]
+
+@app.route("/api/movies/search", methods=["GET"])
+def search_movies():
+    """Typeahead: titles starting with (or containing a word starting with) the query."""
+    query = request.args.get("q", "")
+    if not query.strip():
+        return error_response("q parameter is required", 400)
+    try:
+        limit = _optional_arg("limit", int)
+    except ValueError:
+        return error_response("limit must be a number", 400)
+    if limit is None:
+        limit = 10
+    elif limit < 1:
+        return error_response("limit must be at least 1", 400)
+
+    results = []
+    for pos in dm.title_index.search(query, limit):
+        movie = dm.movies.iloc[pos]
+        mid = int(movie.movie_id) if not pd.isna(movie.movie_id) else 0
+        results.append({
+            "title": str(movie.title),
+            "rating": float(dm.ratings[pos]),
+            "votes": int(dm.votes[pos]),
+            "movie_id": mid,
+            "release_year": dm.get_movie_metadata(mid)["release_year"]
+        })
+    return success_response(results)
 
 @app.route("/api/movies/for-you", methods=["GET"])
 def get_for_you_movies():
@@ -179,7 +275,9 @@ def get_for_you_movies():
     recent_searches = get_recent_searches(user_id)
     if not recent_searches:
         return get_popular_movies()
+    return success_response(_build_for_you(recent_searches))
 
+def _build_for_you(recent_searches):
     all_recommendations = []
     seen_titles = set()
     all_titles = dm.movies["title"].tolist()
@@ -188,10 +286,12 @@ def get_for_you_movies():
         matches = difflib.get_close_matches(term.lower(), all_titles, n=1, cutoff=0.6)
         if matches:
             idx = dm.movies[dm.movies["title"] == matches[0]].index[0]
-            distances = dm.similarity[idx]
-            m_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:11]
-            for i in m_list:
-                m = dm.movies.iloc[i[0]]
+            try:
+                neighbors = _nearest(idx, 10)
+            except ShardTimeout:
+                continue
+            for i in neighbors:
+                m = dm.movies.iloc[i]
                 if m.title not in seen_titles:
                     mid = int(m.movie_id) if not pd.isna(m.movie_id) else 0
                     metadata = dm.get_movie_metadata(mid)
@@ -206,7 +306,7 @@ def get_for_you_movies():
                     seen_titles.add(m.title)
 
     all_recommendations = sorted(all_recommendations, key=lambda x: x["rating"], reverse=True)
-    return success_response(all_recommendations[:20])
+    return all_recommendations[:20]
 
 @app.route("/api/log-search", methods=["POST"])
 def log_search():
@@ -0,0 +1,224 @@
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+import multiprocessing as mp
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Add the current directory to sys.path to allow importing from utils
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import artifacts
+
+ARTIFACT_SIZE = 3 * 1024 * 1024
+CONCURRENT_WORKERS = 6
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler with single-range `Range: bytes=N-` support, standing in for the CDN."""
+
+    def send_head(self):
+        if self.path.startswith("/truncated/"):
+            return self.send_truncated()
+        range_header = self.headers.get("Range")
+        path = self.translate_path(self.path)
+        if not range_header or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        start = int(range_header.split("=")[1].split("-")[0])
+        if start >= size:
+            self.send_error(416)
+            return None
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+        return f
+
+    def send_truncated(self):
+        # Announce the full length, then drop the connection halfway through
+        path = self.translate_path(self.path.replace("/truncated/", "/", 1))
+        with open(path, "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data[:len(data) // 2])
+        self.close_connection = True
+        return None
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(directory):
+    handler = lambda *args, **kwargs: RangeRequestHandler(*args, directory=directory, **kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _fetch_in_worker(args):
+    name, entry, dest, cache = args
+    try:
+        result = artifacts.fetch_artifact(name, entry, dest, cache)
+        return result.bytes_downloaded, result.sha256
+    except Exception as e:
+        return -1, str(e)
+
+
+def run_smoke_test():
+    print("Starting Artifact Fetch Test...")
+    with tempfile.TemporaryDirectory() as root:
+        served, dest, cache = (os.path.join(root, d) for d in ("served", "dest", "cache"))
+        for d in (served, dest, cache):
+            os.makedirs(d)
+
+        manifest = {}
+        blobs = {}
+        for name in ("movies.pkl", "similarity.pkl"):
+            blobs[name] = os.urandom(ARTIFACT_SIZE)
+            with open(os.path.join(served, name), "wb") as f:
+                f.write(blobs[name])
+            manifest[name] = {"sha256": hashlib.sha256(blobs[name]).hexdigest()}
+
+        server = start_server(served)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        for name in manifest:
+            manifest[name]["url"] = f"{base_url}/{name}"
+
+        try:
+            # 1. Fresh parallel download
+            results = artifacts.fetch_all(manifest, dest, cache_dir=cache)
+            if any(r.bytes_downloaded != ARTIFACT_SIZE or r.from_cache for r in results):
+                print("FAILURE: Fresh fetch did not download every artifact in full.")
+                return False
+
+            # 2. A new deployment with the same cache downloads nothing
+            fresh_dest = os.path.join(root, "dest2")
+            os.makedirs(fresh_dest)
+            results = artifacts.fetch_all(manifest, fresh_dest, cache_dir=cache)
+            if any(r.bytes_downloaded or not r.from_cache for r in results):
+                print("FAILURE: Second deployment did not reuse the shared cache.")
+                return False
+
+            # 3. An interrupted download resumes from where it stopped
+            resume_cache = os.path.join(root, "cache2")
+            name = "movies.pkl"
+            sha = manifest[name]["sha256"]
+            os.makedirs(os.path.join(resume_cache, "partial"))
+            with open(os.path.join(resume_cache, "partial", f"{sha}.part"), "wb") as f:
+                f.write(blobs[name][:ARTIFACT_SIZE // 2])
+            resume_dest = os.path.join(root, "dest3")
+            os.makedirs(resume_dest)
+            result = artifacts.fetch_artifact(name, manifest[name], resume_dest, resume_cache)
+            if result.bytes_downloaded != ARTIFACT_SIZE - ARTIFACT_SIZE // 2:
+                print(f"FAILURE: Resume downloaded {result.bytes_downloaded} bytes instead of the remainder.")
+                return False
+            with open(result.path, "rb") as f:
+                if f.read() != blobs[name]:
+                    print("FAILURE: Resumed file does not match the original.")
+                    return False
+
+            # 4. A checksum mismatch is rejected and nothing is placed
+            bad = {"url": manifest[name]["url"], "sha256": "0" * 64}
+            bad_dest = os.path.join(root, "dest4")
+            os.makedirs(bad_dest)
+            try:
+                artifacts.fetch_artifact(name, bad, bad_dest, cache)
+                print("FAILURE: Checksum mismatch was not detected.")
+                return False
+            except artifacts.ArtifactError:
+                pass
+            if os.path.exists(os.path.join(bad_dest, name)):
+                print("FAILURE: Corrupt artifact was written to the destination.")
+                return False
+
+            # 5. Workers sharing one cache fetch the same artifact at once
+            shared_cache = os.path.join(root, "cache3")
+            jobs = []
+            for i in range(CONCURRENT_WORKERS):
+                worker_dest = os.path.join(root, f"worker{i}")
+                os.makedirs(worker_dest)
+                jobs.append((name, manifest[name], worker_dest, shared_cache))
+            with mp.get_context("fork").Pool(CONCURRENT_WORKERS) as pool:
+                outcomes = pool.map(_fetch_in_worker, jobs)
+            if any(downloaded < 0 or digest != sha for downloaded, digest in outcomes):
+                print(f"FAILURE: Concurrent fetch failed: {outcomes}")
+                return False
+            if sum(downloaded for downloaded, _ in outcomes) != ARTIFACT_SIZE:
+                print(f"FAILURE: Concurrent workers downloaded {outcomes} instead of once in total.")
+                return False
+
+            # 6. Without a manifest hash: truncated bodies are rejected ...
+            unpinned_cache = os.path.join(root, "cache4")
+            unpinned_dest = os.path.join(root, "dest5")
+            os.makedirs(unpinned_dest)
+            truncated = {"url": f"{base_url}/truncated/{name}", "sha256": None}
+            try:
+                artifacts.fetch_artifact(name, truncated, unpinned_dest, unpinned_cache)
+                print("FAILURE: Truncated download without a hash was accepted.")
+                return False
+            except artifacts.ArtifactError:
+                pass
+            if os.path.exists(os.path.join(unpinned_dest, name)):
+                print("FAILURE: Truncated artifact was written to the destination.")
+                return False
+
+            # ... an existing unverified file is not trusted, and leftovers are never resumed ...
+            unpinned = {"url": manifest[name]["url"], "sha256": None}
+            with open(os.path.join(unpinned_dest, name), "wb") as f:
+                f.write(blobs[name][:1000])
+            with open(os.path.join(unpinned_cache, "partial", f"{name}.part"), "wb") as f:
+                f.write(b"leftover from another upload")
+            result = artifacts.fetch_artifact(name, unpinned, unpinned_dest, unpinned_cache)
+            if result.bytes_downloaded != ARTIFACT_SIZE or result.sha256 != sha:
+                print("FAILURE: Unpinned fetch kept a truncated file or resumed a leftover partial.")
+                return False
+
+            # ... and the length-checked hash lets a fresh deployment reuse the cache
+            unpinned_dest2 = os.path.join(root, "dest6")
+            os.makedirs(unpinned_dest2)
+            result = artifacts.fetch_artifact(name, unpinned, unpinned_dest2, unpinned_cache)
+            if result.bytes_downloaded or not result.from_cache:
+                print("FAILURE: Unpinned artifact was downloaded again despite the shared cache.")
+                return False
+
+            # 7. A failed download falls back to an existing file only when there is no hash
+            offline_cache = os.path.join(root, "cache5")
+            offline_dest = os.path.join(root, "dest7")
+            os.makedirs(offline_dest)
+            with open(os.path.join(offline_dest, name), "wb") as f:
+                f.write(blobs[name])
+            unreachable = {"url": f"{base_url}/missing/{name}", "sha256": None}
+            result = artifacts.fetch_artifact(name, unreachable, offline_dest, offline_cache)
+            if result.bytes_downloaded or result.sha256 != sha:
+                print("FAILURE: Failed download did not fall back to the existing file.")
+                return False
+            os.remove(os.path.join(offline_dest, name))
+            with open(os.path.join(offline_dest, name), "wb") as f:
+                f.write(b"stale copy")
+            try:
+                artifacts.fetch_artifact(name, dict(unreachable, sha256=sha), offline_dest, offline_cache)
+                print("FAILURE: A file failing the manifest hash was used as a fallback.")
+                return False
+            except artifacts.ArtifactError:
+                pass
+        finally:
+            server.shutdown()
+
+    print("\n--- ARTIFACT FETCH TEST PASSED ---")
+    return True
+
+
+if __name__ == "__main__":
+    if run_smoke_test():
+        sys.exit(0)
+    else:
+        sys.exit(1)
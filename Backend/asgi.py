@@ -0,0 +1,211 @@
+"""
+ASGI entry point: `uvicorn asgi:application --workers 2`
+
+Routes that wait on the database are served natively here, with DB calls on
+a thread pool (database/async_db.py), so one slow query no longer pins a
+worker. Every other route is passed through to the Flask app on a dedicated
+thread pool, so responses keep the same envelope as the WSGI deployment.
+
+Password hashing and the for-you builder run on `cpu_executor`. It is a
+thread pool: it keeps the event loop responsive while they run, but it is not
+CPU parallelism. Hashing (hashlib) and numpy top-K release the GIL and do
+overlap; the difflib title matching in for-you holds it, so for-you
+throughput scales with uvicorn `--workers`, not with CPU_WORKERS.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app, _build_for_you, _build_popular_movies
+from database import async_db
+from utils.responses import EncodedBody, body_cache, choose_encoding
+from utils.security import hash_password, check_password
+from utils.jwt_handler import create_token
+
+# Enough threads to overlap GIL-releasing hashing; more only contend for the GIL
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Threads running pass-through Flask routes (recommend, search, popular, ...) concurrently
+WSGI_WORKERS = int(os.getenv("WSGI_WORKERS", "16"))
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+
+
+async def run_cpu(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(fn, *args, **kwargs))
+
+
+class Request:
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self._receive = receive
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        self.args = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+
+    async def json(self):
+        body = b""
+        while True:
+            message = await self._receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(body) if body else None
+        except ValueError:
+            return None
+
+
+async def send_json(send, request, payload, status=200):
+    body = payload if isinstance(payload, EncodedBody) else EncodedBody(payload)
+    data, used = body.get(choose_encoding(request.headers.get("accept-encoding", "")))
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(data)).encode()),
+        (b"vary", b"Accept-Encoding"),
+        (b"access-control-allow-origin", b"*"),
+    ]
+    if used:
+        headers.append((b"content-encoding", used.encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": data})
+
+
+def success(data):
+    return {"success": True, "data": data, "error": None}
+
+
+def error(message):
+    return {"success": False, "data": None, "error": message}
+
+
+# ==============================
+# Native async routes
+# ==============================
+
+async def log_search(request, send):
+    data = await request.json() or {}
+    user_id = data.get("user_id")
+    movie_title = data.get("movie_title")
+    if not user_id or not movie_title:
+        return await send_json(send, request, error("Missing user_id or movie_title"), 400)
+
+    if await async_db.add_search_history(user_id, movie_title):
+        return await send_json(send, request, success({"message": "Search logged"}))
+    return await send_json(send, request, error("Failed to log search"), 500)
+
+
+async def for_you(request, send):
+    user_id = request.args.get("user_id")
+    recent_searches = await async_db.get_recent_searches(user_id)
+    if recent_searches:
+        data = await run_cpu(_build_for_you, recent_searches)
+        return await send_json(send, request, success(data))
+
+    body = body_cache.get("movies:popular")
+    if body is None:
+        data = await run_cpu(_build_popular_movies)
+        body = EncodedBody(success(data), precompress=True)
+        body_cache.put("movies:popular", body)
+    return await send_json(send, request, body)
+
+
+async def register(request, send):
+    data = await request.json()
+    if not data:
+        return await send_json(send, request, {"error": "Invalid or missing JSON"}, 400)
+
+    name = data.get("name")
+    email = data.get("email")
+    password = data.get("password")
+    if not name or not email or not password:
+        return await send_json(send, request, {"error": "All fields are required"}, 400)
+
+    try:
+        hashed_password = await run_cpu(hash_password, password)
+        await async_db.create_user(name, email, hashed_password)
+    except Exception as e:
+        print("ERROR OCCURRED:", e)
+        return await send_json(send, request, {"error": str(e)}, 500)
+    return await send_json(send, request, {"message": "User registered successfully"}, 201)
+
+
+async def login(request, send):
+    data = await request.json() or {}
+    email = data.get("email")
+    password = data.get("password")
+    if not email or not password:
+        return await send_json(send, request, {"error": "Email and password are required"}, 400)
+
+    try:
+        user = await async_db.get_user_by_email(email)
+        if not user:
+            return await send_json(send, request, {"error": "User not found"}, 404)
+        if not await run_cpu(check_password, password, user["password"]):
+            return await send_json(send, request, {"error": "Invalid password"}, 401)
+        token = create_token(user["id"])
+    except Exception as e:
+        print("LOGIN ERROR:", e)
+        return await send_json(send, request, {"error": str(e)}, 500)
+
+    return await send_json(send, request, {
+        "message": "Login successful",
+        "token": token,
+        "user": {
+            "id": user["id"],
+            "name": user["name"],
+            "email": user["email"]
+        }
+    })
+
+
+ROUTES = {
+    ("POST", "/api/log-search"): log_search,
+    ("POST", "/api/register"): register,
+    ("POST", "/api/login"): login,
+    ("GET", "/api/movies/for-you"): for_you,
+}
+
+
+class MoctailASGI:
+    def __init__(self, wsgi_app):
+        # Pass-through routes run on a2wsgi's own pool of WSGI_WORKERS threads, so
+        # /api/recommend and friends don't queue on one thread the way asgiref's
+        # thread-sensitive WsgiToAsgi made them; their GIL-bound difflib step
+        # still scales with --workers, like for-you above
+        self.wsgi = WSGIMiddleware(wsgi_app, workers=WSGI_WORKERS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        handler = ROUTES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        request = Request(scope, receive) if handler else None
+        # Anonymous "for you" never touches the database; let Flask serve it
+        if handler is for_you and not request.args.get("user_id"):
+            handler = None
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        try:
+            await handler(request, send)
+        except Exception as e:
+            print(f"ASGI ERROR ({scope['path']}): {e}")
+            await send_json(send, request, error("Internal server error"), 500)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                async_db.db_executor.shutdown(wait=False)
+                cpu_executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+application = MoctailASGI(flask_app)
@@ -0,0 +1,78 @@
+"""
+Concurrent-request throughput: WSGI (gunicorn) vs ASGI (uvicorn).
+
+Start both servers against the same database first, e.g.
+    gunicorn app:app --workers 2 --bind 127.0.0.1:5000
+    uvicorn asgi:application --workers 2 --port 5001
+then run
+    python bench_asgi.py http://127.0.0.1:5000 http://127.0.0.1:5001
+"""
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "64"))
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "2000"))
+USER_ID = os.getenv("BENCH_USER_ID", "1")
+
+# Mix of DB-bound and CPU-bound calls, roughly what the dashboard issues
+WORKLOAD = [
+    ("POST", "/api/log-search", {"user_id": USER_ID, "movie_title": "avatar"}),
+    ("GET", f"/api/movies/for-you?user_id={USER_ID}", None),
+    ("GET", "/api/recommend?movie=the dark knight", None),
+    ("GET", "/api/movies/popular", None),
+]
+
+
+def call(base_url, method, path, payload):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(
+        base_url + path.replace(" ", "%20"),
+        data=data,
+        method=method,
+        headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+        ok = True
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_load(base_url):
+    jobs = [WORKLOAD[i % len(WORKLOAD)] for i in range(REQUESTS)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        results = list(pool.map(lambda job: call(base_url, *job), jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    failures = sum(1 for r in results if not r[1])
+    print(f"{base_url}: {REQUESTS / elapsed:.1f} req/s | p50 {np.percentile(latencies, 50):.1f} ms | "
+          f"p95 {np.percentile(latencies, 95):.1f} ms | failures {failures}")
+
+
+def run_benchmark(urls):
+    print(f"{REQUESTS} requests, concurrency {CONCURRENCY}\n")
+    for url in urls:
+        run_load(url.rstrip("/"))
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python bench_asgi.py <wsgi base url> [<asgi base url> ...]")
+        sys.exit(1)
+    if run_benchmark(sys.argv[1:]):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import time
+
+# Add the current directory to sys.path to allow importing app and utils
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from utils import responses
+
+ENDPOINTS = [
+    "/api/recommend?movie=avatar",
+    "/api/movies/recent",
+]
+ENCODINGS = ["identity", "gzip", "br"]
+RUNS = 200
+
+
+def time_it(fn, runs=RUNS):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def run_benchmark():
+    print(f"Encoder: {'orjson' if responses.orjson else 'json'} | "
+          f"brotli: {'yes' if responses.brotli else 'no'}\n")
+    client = app.test_client()
+
+    for url in ENDPOINTS:
+        print(f"=== {url} ===")
+        responses.body_cache.clear()
+        payload = client.get(url).get_json()
+        if not payload or not payload.get("success"):
+            print("FAILURE: endpoint did not return a success envelope.")
+            return False
+
+        with app.app_context():
+            flask_ms = time_it(lambda: app.json.dumps(payload))
+        fast_ms = time_it(lambda: responses.dumps(payload))
+        print(f"serialize  flask jsonify: {flask_ms:.3f} ms | fast encoder: {fast_ms:.3f} ms")
+
+        for encoding in ENCODINGS:
+            if encoding == "br" and responses.brotli is None:
+                continue
+            headers = {"Accept-Encoding": encoding}
+            responses.body_cache.clear()
+            cold_ms = time_it(lambda: client.get(url, headers=headers), runs=1)
+            warm_ms = time_it(lambda: client.get(url, headers=headers))
+            body = client.get(url, headers=headers).get_data()
+            print(f"{encoding:>8}: {len(body):>7} bytes | cold {cold_ms:.3f} ms | warm {warm_ms:.3f} ms")
+
+        plain = len(json.dumps(payload).encode("utf-8"))
+        print(f"  jsonify baseline size: {plain} bytes\n")
+    return True
+
+
+if __name__ == "__main__":
+    if run_benchmark():
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the current directory to sys.path to allow importing from utils
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.neighbors import top_k
+from utils.sharding import ShardCoordinator, write_slices
+
+SHARD_COUNTS = [1, 2, 4, 8]
+QUERIES = 300
+K = 10
+# Catalog size for the synthetic run; pass --real to use movies.pkl / similarity.pkl instead
+CATALOG_SIZE = int(os.getenv("BENCH_CATALOG_SIZE", "8000"))
+
+
+def load_catalog(real):
+    if real:
+        from utils import data_manager
+        data_manager.load_all_data(load_similarity=True)
+        return data_manager.similarity, data_manager.ratings, data_manager.votes, data_manager.years
+
+    rng = np.random.default_rng(42)
+    similarity = rng.random((CATALOG_SIZE, CATALOG_SIZE), dtype=np.float32)
+    ratings = rng.uniform(0, 10, CATALOG_SIZE).astype(np.float32)
+    votes = rng.integers(0, 15000, CATALOG_SIZE)
+    years = rng.integers(1920, 2025, CATALOG_SIZE).astype(np.float32)
+    return similarity, ratings, votes, years
+
+
+def proc_memory_mb(pid):
+    """Measured (RSS, PSS) of a process in MB, from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key = line.split(":")[0]
+            if key in ("Rss", "Pss"):
+                values[key] = int(line.split()[1]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def run_benchmark(real=False):
+    similarity, ratings, votes, years = load_catalog(real)
+    n = similarity.shape[0]
+    queries = np.random.default_rng(7).integers(0, n, QUERIES)
+    filters = {"min_votes": 1000}
+    print(f"Coordinator RSS {proc_memory_mb(os.getpid())[0]:.1f} MB (holds the full matrix only for the benchmark)")
+    print(f"Catalog: {n} movies | {similarity.nbytes / 1e6:.1f} MB similarity | {QUERIES} queries, k={K}\n")
+
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        top_k(similarity[q], K, mask=votes >= 1000, exclude=q)
+        samples.append(time.perf_counter() - start)
+    p50, p95 = percentiles(samples)
+    print(f"{'in-process':>10}: p50 {p50:.3f} ms | p95 {p95:.3f} ms")
+
+    slice_dir = tempfile.mkdtemp(prefix="moctail-bench-slices-")
+    for shard_count in SHARD_COUNTS:
+        paths = write_slices(similarity, ratings, votes, years, shard_count, slice_dir)
+        coordinator = ShardCoordinator.spawn(paths, timeout=5.0)
+        try:
+            coordinator.search(int(queries[0]), K, filters)
+            samples = []
+            for q in queries:
+                start = time.perf_counter()
+                coordinator.search(int(q), K, filters)
+                samples.append(time.perf_counter() - start)
+            p50, p95 = percentiles(samples)
+            slice_mb = max(s["nbytes"] for s in coordinator.stats()) / 1e6
+            memory = [proc_memory_mb(pid) for pid in coordinator.pids()]
+            rss = max(m[0] for m in memory)
+            pss_total = sum(m[1] for m in memory)
+            print(f"{shard_count:>3} shards: p50 {p50:.3f} ms | p95 {p95:.3f} ms | "
+                  f"slice {slice_mb:.1f} MB | max RSS {rss:.1f} MB per shard | total PSS {pss_total:.1f} MB")
+        finally:
+            coordinator.close()
+            for path in paths:
+                os.remove(path)
+    os.rmdir(slice_dir)
+    return True
+
+
+if __name__ == "__main__":
+    if run_benchmark(real="--real" in sys.argv):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,32 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from . import db_utils
+
+# DB calls block on sqlite3/psycopg2, so the ASGI app runs them on a dedicated
+# pool; the event loop keeps serving other requests meanwhile
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+
+async def run_db(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(fn, *args, **kwargs))
+
+
+async def add_search_history(user_id, movie_title):
+    return await run_db(db_utils.add_search_history, user_id, movie_title)
+
+
+async def get_recent_searches(user_id, limit=3):
+    return await run_db(db_utils.get_recent_searches, user_id, limit)
+
+
+async def create_user(name, email, hashed_password):
+    return await run_db(db_utils.create_user, name, email, hashed_password)
+
+
+async def get_user_by_email(email):
+    return await run_db(db_utils.get_user_by_email, email)
@@ -33,3 +33,32 @@ def get_recent_searches(user_id, limit=3):
     except Exception as e:
         print(f"DB Error (get_recent_searches): {e}")
         return []
+
+def create_user(name, email, hashed_password):
+    """Insert a new user. Errors (e.g. duplicate email) propagate to the caller."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    query = "INSERT INTO users (name, email, password) VALUES (?, ?, ?)"
+    import os
+    if os.getenv("DATABASE_URL"): query = query.replace("?", "%s")
+    try:
+        cursor.execute(query, (name, email, hashed_password))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_user_by_email(email):
+    """Return the user row as a dict (id, name, email, password), or None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    query = "SELECT id, name, email, password FROM users WHERE email = ?"
+    import os
+    if os.getenv("DATABASE_URL"): query = query.replace("?", "%s")
+    try:
+        cursor.execute(query, (email,))
+        user = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    return dict(user) if user else None
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+
+# Add the current directory to sys.path to allow importing from utils
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import data_manager
+from utils.neighbors import build_filter_mask, top_k
+
+K = 10
+# Strict filters that the old "top 49 then filter" approach could not fill
+FILTER_CASES = [
+    {"min_votes": 1000},
+    {"min_votes": 5000},
+    {"min_rating": 7.5, "min_votes": 1000},
+    {"min_year": 2010, "max_year": 2015},
+    {"min_rating": 7, "min_year": 1990, "max_year": 1999},
+]
+QUERIES = 200
+
+
+def check_case(filters, queries):
+    mask = build_filter_mask(data_manager.ratings, data_manager.votes, data_manager.years, **filters)
+    for q in queries:
+        qualifying = np.flatnonzero(mask)
+        qualifying = qualifying[qualifying != q]
+        result = top_k(data_manager.similarity[q], K, mask=mask, exclude=q)
+
+        if len(result) != min(K, qualifying.size):
+            print(f"FAILURE: {filters} on movie {q}: got {len(result)} results, "
+                  f"{qualifying.size} qualify.")
+            return False
+        if not all(mask[i] for i in result) or q in result:
+            print(f"FAILURE: {filters} on movie {q}: returned a movie that fails the filter.")
+            return False
+
+        # Same scores as a brute-force sort of the qualifying movies
+        row = np.asarray(data_manager.similarity[q], dtype=np.float64)
+        expected = np.sort(row[qualifying])[::-1][:K]
+        if not np.allclose(row[result], expected):
+            print(f"FAILURE: {filters} on movie {q}: results are not the best qualifying neighbors.")
+            return False
+    return True
+
+
+def run_smoke_test():
+    print("Starting Filtered Neighbor Search Test...")
+    try:
+        data_manager.load_all_data(load_similarity=True)
+        if data_manager.movies is None:
+            print("FAILURE: Movies dataframe is None.")
+            return False
+
+        n = len(data_manager.movies)
+        queries = np.random.default_rng(0).choice(n, size=min(QUERIES, n), replace=False)
+        for filters in FILTER_CASES:
+            if not check_case(filters, queries):
+                return False
+            print(f"SUCCESS: {filters} filled {K} results (or every qualifying movie) on {len(queries)} movies.")
+
+        if build_filter_mask(data_manager.ratings, data_manager.votes, data_manager.years) is not None:
+            print("FAILURE: No filters should produce no mask.")
+            return False
+
+        print("\n--- FILTER TEST PASSED ---")
+        return True
+    except Exception as e:
+        print(f"ERROR: Filter test failed with exception: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    if run_smoke_test():
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -4,6 +4,7 @@ import ast
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from utils.jwt_handler import token_required
+from utils.neighbors import build_filter_mask, top_k
 
 # ==============================
 # 1️⃣ Load Datasets
@@ -136,24 +137,24 @@ def recommend(movie_name, min_rating=0, min_votes=0):
     matched_title = closest_matches[0]
 
     movie_index = titles_lower.index(matched_title)
-    distances = similarity[movie_index]
-
-    movies_list = sorted(list(enumerate(distances)), reverse=True, key=lambda x: x[1])[1:50]
+    # 🔥 Filter inside the neighbor search so strict filters still fill 10 results
+    mask = build_filter_mask(
+        new_df['vote_average'].to_numpy(),
+        new_df['vote_count'].to_numpy(),
+        None,
+        min_rating=min_rating,
+        min_votes=min_votes
+    )
 
     recommendations = []
 
-    for i in movies_list:
-        movie = new_df.iloc[i[0]]
-
-        if movie.vote_average >= min_rating and movie.vote_count >= min_votes:
-            recommendations.append({
-                "title": str(movie.title),
-                "rating": float(movie.vote_average),
-                "votes": int(movie.vote_count)
-            })
-
-        if len(recommendations) == 10:
-            break
+    for i in top_k(similarity[movie_index], 10, mask=mask, exclude=movie_index):
+        movie = new_df.iloc[i]
+        recommendations.append({
+            "title": str(movie.title),
+            "rating": float(movie.vote_average),
+            "votes": int(movie.vote_count)
+        })
 
     return {
         "searched_movie": titles.iloc[movie_index],
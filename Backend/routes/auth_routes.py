@@ -1,10 +1,8 @@
 from flask import Blueprint, request, jsonify
-from database.db import get_db_connection
+from database.db_utils import create_user, get_user_by_email
 from utils.security import hash_password
 from utils.security import hash_password, check_password
-import jwt
-import datetime
-import os
+from utils.jwt_handler import create_token
 
 auth = Blueprint("auth", __name__)
 
@@ -27,16 +25,7 @@ def register():
         # hash password
         hashed_password = hash_password(password)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "INSERT INTO users (name, email, password) VALUES (?, ?, ?)"
-        if os.getenv("DATABASE_URL"): query = query.replace("?", "%s")
-        cursor.execute(query, (name, email, hashed_password))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        create_user(name, email, hashed_password)
 
         return jsonify({"message": "User registered successfully"}), 201
 
@@ -56,35 +45,15 @@ def login():
         if not email or not password:
             return jsonify({"error": "Email and password are required"}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "SELECT id, name, email, password FROM users WHERE email = ?"
-        if os.getenv("DATABASE_URL"): query = query.replace("?", "%s")
-        cursor.execute(query, (email,))
-        user = cursor.fetchone()
-
-        cursor.close()
-        conn.close()
+        user = get_user_by_email(email)
 
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        # user tuple structure for SQLite:
-        # (id, name, email, password)
-        stored_password = user[3]
-
-        if not check_password(password, stored_password):
+        if not check_password(password, user["password"]):
             return jsonify({"error": "Invalid password"}), 401
 
-        token = jwt.encode(
-            {
-                "user_id": user["id"],
-                "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1)
-            },
-            os.getenv("SECRET_KEY"),
-            algorithm="HS256"
-        )
+        token = create_token(user["id"])
         return jsonify({
             "message": "Login successful",
             "token": token,
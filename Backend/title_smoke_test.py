@@ -0,0 +1,102 @@
+import os
+import sys
+import random
+
+# Add the current directory to sys.path to allow importing from utils
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.title_index import TitleIndex, normalize, MAX_RESULTS, SHORT_PREFIX_LEN, SMALL_RANGE
+
+CATALOG_SIZE = 6000
+LIMITS = [1, 5, 10, 20, 50]
+SYLLABLES = ["dar", "kni", "ght", "sta", "rw", "ar", "lo", "ve", "man", "the", "re", "tur", "ni", "al", "en", "qu"]
+# Accents, punctuation and case that normalize() has to fold
+FIXED_TITLES = ["Amélie", "Se7en", "WALL·E", "The Dark Knight", "The Dark Knight Rises", "Knight and Day", "  "]
+
+
+def synthetic_catalog():
+    rng = random.Random(0)
+    vocab = sorted({"".join(rng.choices(SYLLABLES, k=rng.randint(1, 3))) for _ in range(600)})
+    # Zipf-like word frequencies, so some prefixes match thousands of keys
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    rng.shuffle(weights)
+    titles = [" ".join(rng.choices(vocab, weights, k=rng.randint(1, 4))) for _ in range(CATALOG_SIZE)]
+    titles += FIXED_TITLES
+    # Few distinct vote counts, so ties have to break the same way as the brute force
+    votes = [rng.randint(0, 300) for _ in titles]
+    return titles, votes
+
+
+def brute_force(suffixes, order, query, limit):
+    prefix = normalize(query)
+    if not prefix:
+        return [], 0
+    matching_keys = 0
+    matches = set()
+    for pos, keys in enumerate(suffixes):
+        hits = sum(key.startswith(prefix) for key in keys)
+        if hits:
+            matching_keys += hits
+            matches.add(pos)
+    return [pos for pos in order if pos in matches][:min(limit, MAX_RESULTS)], matching_keys
+
+
+def build_queries(suffixes):
+    rng = random.Random(1)
+    keys = sorted({key for keys in suffixes for key in keys})
+    queries = set()
+    for key in keys:
+        for length in range(1, SHORT_PREFIX_LEN + 1):
+            queries.add(key[:length])
+    long_keys = [key for key in keys if len(key) > SHORT_PREFIX_LEN]
+    for key in rng.sample(long_keys, 400):
+        queries.add(key[:rng.randint(SHORT_PREFIX_LEN + 1, len(key))])
+    queries.update(["THE DARK!", "dark kn", "amelie", "se7", "wall e", "zzzz", "", "   ", "knight"])
+    return sorted(queries)
+
+
+def run_smoke_test():
+    print("Starting Title Search Test...")
+    titles, votes = synthetic_catalog()
+    index = TitleIndex(titles, votes)
+
+    suffixes = []
+    for title in titles:
+        words = normalize(title).split()
+        suffixes.append([" ".join(words[i:]) for i in range(len(words))])
+    order = sorted(range(len(titles)), key=lambda pos: -votes[pos])
+
+    paths = {"short prefix": 0, "small range": 0, "rank tree": 0}
+    for query in build_queries(suffixes):
+        for limit in LIMITS:
+            expected, matching_keys = brute_force(suffixes, order, query, limit)
+            result = index.search(query, limit)
+            if result != expected:
+                print(f"FAILURE: search({query!r}, {limit}) returned {result}, expected {expected}.")
+                return False
+
+        prefix = normalize(query)
+        if not prefix:
+            continue
+        if len(prefix) <= SHORT_PREFIX_LEN:
+            paths["short prefix"] += 1
+        elif matching_keys <= SMALL_RANGE:
+            paths["small range"] += 1
+        else:
+            paths["rank tree"] += 1
+
+    for path, count in paths.items():
+        if count == 0:
+            print(f"FAILURE: No query exercised the {path} path.")
+            return False
+        print(f"SUCCESS: {count} {path} queries match the brute-force ranking for limits {LIMITS}.")
+
+    print("\n--- TITLE SEARCH TEST PASSED ---")
+    return True
+
+
+if __name__ == "__main__":
+    if run_smoke_test():
+        sys.exit(0)
+    else:
+        sys.exit(1)
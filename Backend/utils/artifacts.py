@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import requests
+
+try:
+    import fcntl
+except ImportError:
+    # Windows dev machines: single process, no cross-process locking
+    fcntl = None
+
+# Shared across deployments on the same host/volume; files are stored by SHA-256
+CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "moctail", "artifacts"))
+# Refuse manifest entries without a sha256 instead of trusting a length-checked download
+REQUIRE_SHA256 = os.getenv("ARTIFACT_REQUIRE_SHA256", "0") == "1"
+CHUNK_SIZE = 1024 * 1024
+MAX_WORKERS = 4
+TIMEOUT = 60
+
+
+class ArtifactError(Exception):
+    pass
+
+
+@dataclass
+class FetchResult:
+    name: str
+    path: str
+    sha256: str
+    bytes_downloaded: int
+    seconds: float
+    from_cache: bool
+
+
+def load_manifest(path):
+    """Manifest format: {"<file name>": {"url": "...", "sha256": "<hex or null>"}}"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def unpinned_entries(manifest):
+    """Names of manifest entries that have no sha256 to verify against."""
+    return [name for name, entry in manifest.items() if not entry.get("sha256")]
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, sha256):
+    return os.path.join(cache_dir, "sha256", sha256[:2], sha256)
+
+
+def _pin_path(cache_dir, url):
+    """Where the hash of a complete download of `url` is remembered when the manifest has none."""
+    return os.path.join(cache_dir, "by-url", hashlib.sha256(url.encode()).hexdigest())
+
+
+@contextmanager
+def _locked(cache_dir, key):
+    """Exclusive cross-process lock, so workers sharing the cache never write the same file at once."""
+    lock_dir = os.path.join(cache_dir, "locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"{key}.lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _atomic_write_text(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _atomic_place(src, dest):
+    """Make `dest` a copy of `src` (hard link when possible) without exposing a partial file."""
+    tmp = f"{dest}.tmp-{os.getpid()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def _expected_total(resp):
+    content_range = resp.headers.get("Content-Range", "")
+    if resp.status_code == 206 and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _download(url, part_path, resume):
+    """
+    Download `url` into `part_path`, resuming with an HTTP Range request when
+    `resume` is set and a partial file exists. Raises ArtifactError if the
+    body is shorter or longer than the server announced.
+    """
+    offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=TIMEOUT) as resp:
+            if resp.status_code == 416:
+                # Range not satisfiable: the part file already holds the whole body
+                return 0
+            resp.raise_for_status()
+            if offset and resp.status_code != 206:
+                # Server ignored the Range header; start over
+                offset = 0
+            if "text/html" in resp.headers.get("Content-Type", ""):
+                raise ArtifactError(f"Expected a binary file from {url}, got an HTML page")
+            total = _expected_total(resp)
+
+            downloaded = 0
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    downloaded += len(chunk)
+    except requests.RequestException as e:
+        raise ArtifactError(f"Download of {url} failed: {e}") from e
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise ArtifactError(f"Incomplete download of {url}: got {size} of {total} bytes")
+    return downloaded
+
+
+def fetch_artifact(name, entry, dest_dir, cache_dir=CACHE_DIR):
+    """Ensure `dest_dir/name` exists and matches its checksum, downloading only if needed."""
+    start = time.perf_counter()
+    url = entry["url"]
+    dest = os.path.join(dest_dir, name)
+    manifest_sha = (entry.get("sha256") or "").lower() or None
+    if manifest_sha is None and REQUIRE_SHA256:
+        raise ArtifactError(f"No sha256 in manifest for {name} and ARTIFACT_REQUIRE_SHA256=1")
+
+    lock_key = manifest_sha or hashlib.sha256(url.encode()).hexdigest()
+    with _locked(cache_dir, lock_key):
+        pin = _pin_path(cache_dir, url)
+        expected = manifest_sha
+        if expected is None and os.path.exists(pin):
+            with open(pin) as f:
+                expected = f.read().strip() or None
+
+        if expected:
+            cached = _cache_path(cache_dir, expected)
+            if os.path.exists(dest) and _sha256_file(dest) == expected:
+                return FetchResult(name, dest, expected, 0, time.perf_counter() - start, True)
+            if os.path.exists(cached) and _sha256_file(cached) == expected:
+                _atomic_place(cached, dest)
+                return FetchResult(name, dest, expected, 0, time.perf_counter() - start, True)
+
+        tmp_dir = os.path.join(cache_dir, "partial")
+        os.makedirs(tmp_dir, exist_ok=True)
+        if manifest_sha:
+            # Only resume data that the manifest hash will verify at the end
+            part_path = os.path.join(tmp_dir, f"{manifest_sha}.part")
+            resume = True
+        else:
+            fd, part_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+            os.close(fd)
+            resume = False
+
+        try:
+            downloaded = _download(url, part_path, resume)
+        except ArtifactError as e:
+            if not resume and os.path.exists(part_path):
+                os.remove(part_path)
+            if manifest_sha is None and os.path.exists(dest):
+                # Nothing to verify against either way; offline dev and Drive outages keep working
+                print(f"WARNING: {e}")
+                print(f"WARNING: Falling back to the existing, UNVERIFIED {dest}. "
+                      f"Pin the manifest with `python -m utils.artifacts --pin`.")
+                return FetchResult(name, dest, _sha256_file(dest), 0, time.perf_counter() - start, True)
+            raise
+
+        actual = _sha256_file(part_path)
+        if manifest_sha and actual != manifest_sha:
+            os.remove(part_path)
+            raise ArtifactError(f"Checksum mismatch for {name}: expected {manifest_sha}, got {actual}")
+        if not manifest_sha:
+            print(f"WARNING: No sha256 in manifest for {name}; length-checked download has sha256 {actual}")
+            _atomic_write_text(pin, actual)
+
+        cached = _cache_path(cache_dir, actual)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        os.replace(part_path, cached)
+        _atomic_place(cached, dest)
+        return FetchResult(name, dest, actual, downloaded, time.perf_counter() - start, False)
+
+
+def fetch_all(manifest, dest_dir, cache_dir=CACHE_DIR, max_workers=MAX_WORKERS):
+    """Fetch every manifest entry in parallel; returns one FetchResult per artifact."""
+    unpinned = unpinned_entries(manifest)
+    if unpinned:
+        print(f"WARNING: No sha256 in manifest for {', '.join(unpinned)}; downloads are only length-checked. "
+              f"Pin them with `python -m utils.artifacts --pin <manifest>`.")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(fetch_artifact, name, entry, dest_dir, cache_dir)
+            for name, entry in manifest.items()
+        ]
+        results = [future.result() for future in futures]
+
+    for r in results:
+        source = "cache" if r.from_cache else "download"
+        print(f"{r.name}: {r.bytes_downloaded} bytes in {r.seconds:.2f}s ({source}, sha256 {r.sha256[:12]})")
+    return results
+
+
+def pin_manifest(path, dest_dir, cache_dir=CACHE_DIR):
+    """Download every artifact and write its sha256 into the manifest."""
+    manifest = load_manifest(path)
+    for result in fetch_all(manifest, dest_dir, cache_dir):
+        manifest[result.name]["sha256"] = result.sha256
+    _atomic_write_text(path, json.dumps(manifest, indent=4) + "\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--pin":
+        pin_manifest(sys.argv[2], os.path.dirname(os.path.abspath(sys.argv[2])))
+    elif len(sys.argv) == 3 and sys.argv[1] == "--check":
+        # Pre-merge / CI gate: every artifact must carry a sha256
+        unpinned = unpinned_entries(load_manifest(sys.argv[2]))
+        if unpinned:
+            print(f"ERROR: No sha256 for {', '.join(unpinned)}; run `python -m utils.artifacts --pin {sys.argv[2]}`")
+            sys.exit(1)
+        print("All artifacts are pinned.")
+    else:
+        print("Usage: python -m utils.artifacts --pin <manifest.json>")
+        print("       python -m utils.artifacts --check <manifest.json>")
+        sys.exit(1)
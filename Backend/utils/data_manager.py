@@ -1,34 +1,42 @@
 import pandas as pd
+import numpy as np
 import pickle
 import ast
 import os
-import requests
+from utils.artifacts import load_manifest, fetch_all
+from utils.sharding import sharding_enabled
+from utils.title_index import TitleIndex
 
 # Centralized data storage
 movies = None
 similarity = None
 metadata_lookup = None
+# Per-movie filter columns, aligned with the rows of `movies` / `similarity`
+ratings = None
+votes = None
+years = None
+# Prefix index for typeahead title search
+title_index = None
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_DIR = os.path.join(BASE_DIR, "..")
 
-# 🔹 Google Drive Direct Download Links
-MOVIES_URL = "https://drive.google.com/uc?export=download&id=1mr-XpKUeurYpVS1PWLOsIFLdyNztJw3h"
-SIMILARITY_URL = "https://drive.google.com/uc?export=download&id=1QV1n7j9MDnZBBdim28mxVBij5doG-nko"
+# 🔹 Artifact manifest (Google Drive download links + SHA-256 checksums)
+MANIFEST_PATH = os.getenv("ARTIFACT_MANIFEST", os.path.join(BACKEND_DIR, "artifacts.json"))
 
-def download_file(url, path):
-    if not os.path.exists(path):
-        import gdown
-        print(f"Downloading {os.path.basename(path)} from cloud using gdown...")
-        gdown.download(url, path, quiet=False)
-        print(f"{os.path.basename(path)} downloaded successfully.")
+def load_all_data(load_similarity=None):
+    """
+    Load ML models and metadata lookup precisely once.
 
-def load_all_data():
-    """Load ML models and metadata lookup precisely once."""
-    global movies, similarity, metadata_lookup
+    The full similarity matrix is skipped when sharding is enabled (unless
+    `load_similarity` says otherwise): shard workers load their own slices.
+    """
+    global movies, similarity, metadata_lookup, ratings, votes, years, title_index
     
     if movies is not None:
         return
+    if load_similarity is None:
+        load_similarity = not sharding_enabled()
         
     try:
         # Construct absolute paths inside backend folder
@@ -37,17 +45,22 @@ def load_all_data():
         
         print(f"DEBUG: Backend directory: {BACKEND_DIR}")
         
-        # 🔥 Download from cloud if not exists
-        download_file(MOVIES_URL, movies_path)
-        download_file(SIMILARITY_URL, similarity_path)
+        # 🔥 Download from cloud (or the shared cache) if missing or corrupt
+        manifest = load_manifest(MANIFEST_PATH)
+        if not load_similarity:
+            manifest.pop("similarity.pkl", None)
+        fetch_all(manifest, BACKEND_DIR)
 
         # Load ML Files
         movies = pickle.load(open(movies_path, "rb"))
-        similarity = pickle.load(open(similarity_path, "rb"))
+        if load_similarity:
+            similarity = pickle.load(open(similarity_path, "rb"))
         movies["title"] = movies["title"].str.lower()
         
         # Build Metadata Lookup
         metadata_lookup = _build_metadata_lookup()
+        ratings, votes, years = _build_filter_arrays()
+        title_index = TitleIndex(movies["title"].tolist(), votes)
         
         print("✅ SUCCESS: Data and ML models loaded.")
 
@@ -84,6 +97,17 @@ def _build_metadata_lookup():
         }
     return lookup
 
+def _build_filter_arrays():
+    """Vectorized rating/vote/year columns used to push filters into neighbor search."""
+    rating_arr = pd.to_numeric(movies["vote_average"], errors="coerce").fillna(0.0).to_numpy(dtype=np.float32)
+    vote_arr = pd.to_numeric(movies["vote_count"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    year_list = []
+    for mid in movies["movie_id"]:
+        year = get_movie_metadata(int(mid)).get("release_year", "") if not pd.isna(mid) else ""
+        year_list.append(int(year) if str(year).isdigit() else np.nan)
+    year_arr = np.array(year_list, dtype=np.float32)
+    return rating_arr, vote_arr, year_arr
+
 def get_movie_metadata(mid):
     global metadata_lookup
     if metadata_lookup and mid in metadata_lookup:
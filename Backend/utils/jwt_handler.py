@@ -1,8 +1,19 @@
 import jwt
 import os
+import datetime
 from functools import wraps
 from flask import request, jsonify
 
+def create_token(user_id):
+    return jwt.encode(
+        {
+            "user_id": user_id,
+            "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1)
+        },
+        os.getenv("SECRET_KEY"),
+        algorithm="HS256"
+    )
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
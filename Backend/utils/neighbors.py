@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def build_filter_mask(ratings, votes, years, min_rating=None, min_votes=None, min_year=None, max_year=None):
+    """Boolean mask of movies passing every given filter, or None when no filter is set."""
+    mask = None
+
+    def _and(current, condition):
+        return condition if current is None else current & condition
+
+    if min_rating is not None:
+        mask = _and(mask, ratings >= min_rating)
+    if min_votes is not None:
+        mask = _and(mask, votes >= min_votes)
+    # Movies without a known release year never match a year filter (NaN compares False)
+    if min_year is not None:
+        mask = _and(mask, years >= min_year)
+    if max_year is not None:
+        mask = _and(mask, years <= max_year)
+    return mask
+
+
+def top_k(scores, k, mask=None, exclude=None):
+    """
+    Return up to `k` row positions with the highest scores, best first.
+
+    The filter is applied inside the scan, so as long as `k` movies qualify
+    exactly `k` come back, at O(n) cost regardless of how strict the filter is.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if mask is None:
+        keep = np.ones(scores.shape[0], dtype=bool)
+    else:
+        keep = np.array(mask, dtype=bool, copy=True)
+    if exclude is not None:
+        keep[exclude] = False
+
+    candidates = np.flatnonzero(keep)
+    if candidates.size == 0 or k <= 0:
+        return []
+
+    candidate_scores = scores[candidates]
+    if candidates.size > k:
+        part = np.argpartition(-candidate_scores, k - 1)[:k]
+        candidates = candidates[part]
+        candidate_scores = candidate_scores[part]
+
+    order = np.argsort(-candidate_scores, kind="stable")
+    return candidates[order].tolist()
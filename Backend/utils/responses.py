@@ -0,0 +1,163 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from flask import Response, request
+
+# Optional fast encoder / brotli support, used when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Precompressed bodies can afford the slower, denser settings
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 11
+MAX_CACHED_BODIES = 512
+
+
+def dumps(obj):
+    """Encode an object to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _compress(raw, encoding, precompressed=False):
+    if encoding == "br":
+        quality = PRECOMPRESS_BROTLI_QUALITY if precompressed else BROTLI_QUALITY
+        return brotli.compress(raw, quality=quality)
+    level = PRECOMPRESS_GZIP_LEVEL if precompressed else GZIP_LEVEL
+    return gzip.compress(raw, compresslevel=level, mtime=0)
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best content-coding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+class EncodedBody:
+    """A JSON body encoded once, with its compressed variants kept alongside it."""
+
+    __slots__ = ("identity", "variants", "keep_variants")
+
+    def __init__(self, payload, precompress=False, keep_variants=False):
+        self.identity = dumps(payload)
+        self.variants = {}
+        self.keep_variants = keep_variants or precompress
+        if precompress and len(self.identity) >= MIN_COMPRESS_SIZE:
+            for encoding in supported_encodings():
+                self.variants[encoding] = _compress(self.identity, encoding, precompressed=True)
+
+    def get(self, encoding):
+        if encoding is None or len(self.identity) < MIN_COMPRESS_SIZE:
+            return self.identity, None
+        body = self.variants.get(encoding)
+        if body is None:
+            # Only the requested encoding, at the cheap per-request settings
+            body = _compress(self.identity, encoding)
+            if self.keep_variants:
+                self.variants[encoding] = body
+        # Never send a "compressed" body that came out larger
+        if len(body) >= len(self.identity):
+            return self.identity, None
+        return body, encoding
+
+
+class BodyCache:
+    """Small thread-safe LRU of encoded bodies keyed by the caller."""
+
+    def __init__(self, max_entries=MAX_CACHED_BODIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+body_cache = BodyCache()
+
+
+def build_response(body, status=200):
+    """Turn an EncodedBody into a Flask response negotiated against Accept-Encoding."""
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    data, used = body.get(encoding)
+    response = Response(data, status=status, mimetype="application/json")
+    if used:
+        response.headers["Content-Encoding"] = used
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def json_response(payload, status=200):
+    return build_response(EncodedBody(payload), status)
+
+
+def cached_json_response(key, build_payload, status=200, should_cache=None, precompress=False):
+    """
+    Serve a cacheable payload, encoding it only on first use.
+
+    `precompress` spends the slow, dense compression settings up front and is
+    meant for the few truly static keys; per-query bodies are compressed
+    lazily, per requested encoding, at the per-request settings.
+    """
+    body = body_cache.get(key)
+    if body is None:
+        payload = build_payload()
+        if should_cache is not None and not should_cache(payload):
+            return json_response(payload, status)
+        body = EncodedBody(payload, precompress=precompress, keep_variants=True)
+        body_cache.put(key, body)
+    return build_response(body, status)
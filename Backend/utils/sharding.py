@@ -0,0 +1,555 @@
+import atexit
+import heapq
+import itertools
+import os
+import secrets
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, Listener, answer_challenge, deliver_challenge, wait
+
+import numpy as np
+
+from utils.neighbors import build_filter_mask, top_k
+
+# Optional sharded mode, configured through the environment:
+#   SHARD_COUNT               number of local shard worker processes (0/1 = disabled)
+#   SHARD_SLICE_DIR           where `python -m utils.sharding --split N` writes the per-shard slices
+#   SHARD_ADDRESSES           comma separated host:port list of remote shard servers
+#   SHARD_AUTHKEY             shared secret for remote shard connections (required with SHARD_ADDRESSES)
+#   SHARD_TIMEOUT             seconds to wait for all shards before giving up on the slow ones
+#   SHARD_ALLOW_PARTIAL       "1" to answer from the shards that replied in time, "0" to fail
+#   SHARD_RECONNECT_INTERVAL  seconds between background attempts to reach (or respawn) a lost shard
+#   SHARD_CONNECT_TIMEOUT     seconds a background (re)connect, handshake included, may take
+#
+# Shard connections use multiprocessing.connection, which unpickles what it
+# receives: the authkey is the only thing standing between the port and code
+# execution. Bind remote shard servers to loopback or a private interface only.
+SHARD_TIMEOUT = float(os.getenv("SHARD_TIMEOUT", "0.5"))
+SHARD_ALLOW_PARTIAL = os.getenv("SHARD_ALLOW_PARTIAL", "1") == "1"
+SHARD_RECONNECT_INTERVAL = float(os.getenv("SHARD_RECONNECT_INTERVAL", "1.0"))
+SHARD_CONNECT_TIMEOUT = float(os.getenv("SHARD_CONNECT_TIMEOUT", "2.0"))
+SHARD_BACKLOG = 128
+# How long spawn() waits for local workers to come up before serving partial results
+SHARD_STARTUP_TIMEOUT = float(os.getenv("SHARD_STARTUP_TIMEOUT", "30"))
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SHARD_SLICE_DIR = os.getenv("SHARD_SLICE_DIR", os.path.join(BACKEND_DIR, "shards"))
+
+
+class ShardTimeout(Exception):
+    pass
+
+
+def shard_bounds(n, shard_count):
+    """Split `n` catalog rows into `shard_count` contiguous (start, stop) ranges."""
+    base, extra = divmod(n, shard_count)
+    bounds = []
+    start = 0
+    for shard_id in range(shard_count):
+        stop = start + base + (1 if shard_id < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def slice_paths(slice_dir, shard_count):
+    return [os.path.join(slice_dir, f"shard-{shard_id}-of-{shard_count}.npz") for shard_id in range(shard_count)]
+
+
+def write_slices(similarity, ratings, votes, years, shard_count, slice_dir=SHARD_SLICE_DIR):
+    """Split the catalog into one .npz file per shard; returns their paths."""
+    os.makedirs(slice_dir, exist_ok=True)
+    paths = slice_paths(slice_dir, shard_count)
+    for path, (start, stop) in zip(paths, shard_bounds(similarity.shape[1], shard_count)):
+        Shard.from_catalog(similarity, ratings, votes, years, start, stop).save(path)
+    return paths
+
+
+def sharding_enabled():
+    """True when SHARD_* settings move neighbor search out of the app process."""
+    return bool(_shard_addresses()) or _shard_count() > 1
+
+
+def _shard_addresses():
+    return [a for a in os.getenv("SHARD_ADDRESSES", "").split(",") if a.strip()]
+
+
+def _shard_count():
+    return int(os.getenv("SHARD_COUNT", "0") or 0)
+
+
+def require_authkey(authkey):
+    if not authkey:
+        raise ValueError("SHARD_AUTHKEY must be set: shard connections unpickle incoming data")
+    return authkey
+
+
+class Shard:
+    """One shard's slice of the catalog: its similarity columns plus its filter columns."""
+
+    def __init__(self, scores, ratings, votes, years, start, stop):
+        self.start = start
+        self.stop = stop
+        self.scores = scores
+        self.ratings = ratings
+        self.votes = votes
+        self.years = years
+
+    @classmethod
+    def from_catalog(cls, similarity, ratings, votes, years, start, stop):
+        """Copy this shard's columns out of the full catalog."""
+        return cls(
+            np.ascontiguousarray(similarity[:, start:stop], dtype=np.float32),
+            np.ascontiguousarray(ratings[start:stop]),
+            np.ascontiguousarray(votes[start:stop]),
+            np.ascontiguousarray(years[start:stop]),
+            start,
+            stop
+        )
+
+    def save(self, path):
+        # Write then rename, so a shard starting up never loads a half-written slice
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "wb") as f:
+            np.savez(f, scores=self.scores, ratings=self.ratings, votes=self.votes,
+                     years=self.years, bounds=np.array([self.start, self.stop]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            start, stop = (int(b) for b in data["bounds"])
+            return cls(data["scores"], data["ratings"], data["votes"], data["years"], start, stop)
+
+    @property
+    def nbytes(self):
+        return self.scores.nbytes + self.ratings.nbytes + self.votes.nbytes + self.years.nbytes
+
+    def search(self, movie_index, k, filters):
+        """Local top-K as (score, global index) pairs, best first."""
+        mask = build_filter_mask(self.ratings, self.votes, self.years, **filters)
+        exclude = movie_index - self.start if self.start <= movie_index < self.stop else None
+        row = self.scores[movie_index]
+        return [(float(row[i]), i + self.start) for i in top_k(row, k, mask=mask, exclude=exclude)]
+
+    def handle(self, message):
+        req_id, op, args = message
+        if op == "search":
+            return req_id, self.search(*args)
+        if op == "stats":
+            return req_id, {"start": self.start, "stop": self.stop, "nbytes": self.nbytes, "pid": os.getpid()}
+        return req_id, None
+
+
+def _serve_connection(conn, shard, authkey):
+    # Authenticate here rather than in Listener.accept(), so a client that
+    # stalls mid-handshake ties up only its own thread
+    try:
+        _set_io_timeout(conn.fileno(), SHARD_CONNECT_TIMEOUT)
+        deliver_challenge(conn, authkey)
+        answer_challenge(conn, authkey)
+        _set_io_timeout(conn.fileno(), None)
+    except (AuthenticationError, EOFError, OSError) as e:
+        print(f"Shard {shard.start}-{shard.stop}: rejected connection ({e})")
+        _close_quietly(conn)
+        return
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        conn.send(shard.handle(message))
+    conn.close()
+
+
+def _serve(address, shard, authkey):
+    # Every coordinator thread opens its own connections; the default backlog of 1 would drop them
+    listener = Listener(address, backlog=SHARD_BACKLOG)
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError as e:
+            print(f"Shard {shard.start}-{shard.stop}: accept failed ({e})")
+            continue
+        threading.Thread(target=_serve_connection, args=(conn, shard, authkey), daemon=True).start()
+
+
+def _set_io_timeout(fd, seconds):
+    """
+    Bound every blocking read/write on `fd` (None = wait forever) while
+    leaving it in blocking mode, as Connection needs.
+    """
+    seconds = 0 if seconds is None else max(seconds, 0.001)
+    timeval = struct.pack("ll", int(seconds), int(seconds % 1 * 1e6))
+    sock = socket.socket(fileno=fd)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, timeval)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeval)
+    finally:
+        sock.detach()
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except OSError:
+        pass
+
+
+def _connect(address, authkey, deadline):
+    """
+    Open an authenticated connection to a shard before `deadline`, handshake
+    included, so a shard that accepts connections but never answers fails fast.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise socket.timeout("no time left to connect")
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(remaining)
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+    else:
+        sock = socket.create_connection(address, timeout=remaining)
+    sock.settimeout(None)
+    conn = Connection(sock.detach())
+    try:
+        _set_io_timeout(conn.fileno(), deadline - time.monotonic())
+        answer_challenge(conn, authkey)
+        deliver_challenge(conn, authkey)
+        # Backstop for a shard that stalls halfway through a reply
+        _set_io_timeout(conn.fileno(), SHARD_CONNECT_TIMEOUT)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class ShardHandle:
+    """
+    One shard endpoint with a pool of idle connections, so concurrent queries
+    never share one. A lost shard is reconnected (and a local one respawned)
+    by a background thread, never on the request path.
+    """
+
+    def __init__(self, address, authkey, launch=None):
+        self.address = address
+        self.authkey = authkey
+        self.launch = launch
+        self.process = launch() if launch else None
+        self.healthy = False
+        self._idle = []
+        self._lock = threading.Lock()
+        self._reconnecting = False
+        self._closed = False
+        self.reconnect()
+
+    def take_idle(self):
+        with self._lock:
+            return self._idle.pop() if self._idle else None
+
+    def open(self, deadline):
+        """A new connection opened before `deadline`, or None while the shard is down."""
+        if not self.healthy:
+            self.reconnect()
+            return None
+        try:
+            return _connect(self.address, self.authkey, deadline)
+        except (OSError, EOFError, AuthenticationError):
+            self.mark_down()
+            return None
+
+    def release(self, conn):
+        with self._lock:
+            if self.healthy:
+                self._idle.append(conn)
+                return
+        _close_quietly(conn)
+
+    def discard(self, conn):
+        """Close a connection that failed or still owes a reply, and probe the shard in the background."""
+        _close_quietly(conn)
+        self.mark_down()
+
+    def mark_down(self):
+        with self._lock:
+            self.healthy = False
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn)
+        self.reconnect()
+
+    def reconnect(self):
+        with self._lock:
+            if self._reconnecting or self._closed:
+                return
+            self._reconnecting = True
+        threading.Thread(target=self._reconnect_loop, daemon=True).start()
+
+    def _reconnect_loop(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    self._reconnecting = False
+                    return
+                if self.launch and self.process.poll() is not None:
+                    print(f"Shard {self.address} exited with {self.process.returncode}; respawning")
+                    self.process = self.launch()
+            try:
+                conn = _connect(self.address, self.authkey, time.monotonic() + SHARD_CONNECT_TIMEOUT)
+            except (OSError, EOFError, AuthenticationError):
+                time.sleep(SHARD_RECONNECT_INTERVAL)
+                continue
+            with self._lock:
+                self._reconnecting = False
+                if not self._closed:
+                    self._idle.append(conn)
+                    self.healthy = True
+                    return
+            _close_quietly(conn)
+            return
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self.healthy = False
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            _close_quietly(conn)
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class ShardResult(list):
+    """Merged neighbor indices; `partial` is set when some shards did not answer in time."""
+    partial = False
+
+
+class ShardCoordinator:
+    """Scatters a neighbor query to every shard and heap-merges their local top-K lists."""
+
+    def __init__(self, handles, timeout=SHARD_TIMEOUT, allow_partial=SHARD_ALLOW_PARTIAL, workdir=None):
+        self.handles = list(handles)
+        self.timeout = timeout
+        self.allow_partial = allow_partial
+        self.workdir = workdir
+        self._ids = itertools.count(1)
+        atexit.register(self.close)
+
+    @classmethod
+    def spawn(cls, paths, **kwargs):
+        """
+        Start one local shard process per precomputed slice (see `write_slices`).
+
+        Each worker is a fresh interpreter that loads only its own slice, and the
+        app process never loads the full matrix either.
+        """
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(
+                f"Missing shard slices {missing}; run `python -m utils.sharding --split {len(paths)}` first"
+            )
+        workdir = tempfile.mkdtemp(prefix="moctail-shards-")
+        authkey = secrets.token_bytes(32)
+        handles = []
+        for shard_id, slice_path in enumerate(paths):
+            address = os.path.join(workdir, f"shard-{shard_id}.sock")
+            handles.append(ShardHandle(address, authkey, launch=_local_launcher(address, slice_path, authkey)))
+        coordinator = cls(handles, workdir=workdir, **kwargs)
+        coordinator.wait_ready(SHARD_STARTUP_TIMEOUT)
+        return coordinator
+
+    @classmethod
+    def connect(cls, addresses, authkey, **kwargs):
+        """Use shard servers started with `python -m utils.sharding`; unreachable ones are retried in the background."""
+        require_authkey(authkey)
+        return cls([ShardHandle(_parse_address(address), authkey) for address in addresses], **kwargs)
+
+    def wait_ready(self, timeout):
+        """Wait up to `timeout` seconds for every shard to connect; stragglers keep connecting in the background."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(h.healthy for h in self.handles):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _scatter(self, op, args):
+        """
+        Send one request to every reachable shard and collect replies until the
+        deadline. Each call checks out its own connections, so concurrent
+        queries overlap instead of queueing behind a shared one.
+        """
+        message = (next(self._ids), op, args)
+        deadline = time.monotonic() + self.timeout
+        handles = list(self.handles)
+        pending = {}
+
+        def send(handle, conn):
+            try:
+                conn.send(message)
+                pending[conn] = handle
+            except OSError:
+                handle.discard(conn)
+
+        # Shards with an idle connection go first, so a slow connect can't delay them
+        needs_connection = []
+        for handle in handles:
+            conn = handle.take_idle()
+            if conn is None:
+                needs_connection.append(handle)
+            else:
+                send(handle, conn)
+        for handle in needs_connection:
+            conn = handle.open(deadline)
+            if conn is not None:
+                send(handle, conn)
+
+        replies = []
+        while pending:
+            # A final zero-timeout pass still collects replies that arrived during a slow connect
+            ready = wait(list(pending), timeout=max(deadline - time.monotonic(), 0))
+            if not ready:
+                break
+            for conn in ready:
+                handle = pending.pop(conn)
+                try:
+                    _, payload = conn.recv()
+                except (EOFError, OSError):
+                    # Shard died or restarted; it is reconnected in the background
+                    handle.discard(conn)
+                    continue
+                replies.append(payload)
+                handle.release(conn)
+        for conn, handle in pending.items():
+            # Still owes a reply to this query, so it can't be reused
+            handle.discard(conn)
+        return replies, len(handles) - len(replies)
+
+    def search(self, movie_index, k, filters=None):
+        replies, missing = self._scatter("search", (int(movie_index), k, filters or {}))
+        if missing and (not self.allow_partial or not replies):
+            raise ShardTimeout(f"{missing} of {len(self.handles)} shards did not answer in time")
+
+        merged = heapq.merge(*replies, key=lambda pair: -pair[0])
+        result = ShardResult(index for _, index in itertools.islice(merged, k))
+        result.partial = bool(missing)
+        return result
+
+    def stats(self):
+        replies, _ = self._scatter("stats", None)
+        return sorted(replies, key=lambda s: s["start"])
+
+    def pids(self):
+        return [h.process.pid for h in self.handles if h.process is not None]
+
+    def close(self):
+        handles, self.handles = self.handles, []
+        for handle in handles:
+            handle.close()
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+
+
+def _local_launcher(address, slice_path, authkey):
+    def launch():
+        if os.path.exists(address):
+            os.remove(address)
+        env = dict(os.environ, SHARD_AUTHKEY=authkey.hex(), SHARD_PARENT_PID=str(os.getpid()))
+        return subprocess.Popen(
+            [sys.executable, "-m", "utils.sharding", "--local", address, slice_path],
+            cwd=BACKEND_DIR,
+            env=env
+        )
+    return launch
+
+
+def _parse_address(address):
+    host, _, port = address.strip().rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def coordinator_from_env():
+    """Build a coordinator from SHARD_* settings, or None when sharding is disabled."""
+    addresses = _shard_addresses()
+    if addresses:
+        return ShardCoordinator.connect(addresses, os.getenv("SHARD_AUTHKEY", "").encode())
+
+    shard_count = _shard_count()
+    if shard_count > 1:
+        return ShardCoordinator.spawn(slice_paths(SHARD_SLICE_DIR, shard_count))
+    return None
+
+
+def _exit_with_parent(parent_pid):
+    # Local shards must not outlive the app process that started them
+    while True:
+        time.sleep(1)
+        if os.getppid() != parent_pid:
+            os._exit(0)
+
+
+def serve_local_shard(address, slice_path, authkey):
+    """Worker started by ShardCoordinator.spawn: serve one slice on a private unix socket."""
+    parent_pid = int(os.getenv("SHARD_PARENT_PID", "0"))
+    if parent_pid:
+        threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+    shard = Shard.load(slice_path)
+    _serve(address, shard, authkey)
+
+
+def serve_shard(address, slice_path, authkey):
+    """Run one precomputed slice as a standalone server that coordinators reach over a socket."""
+    shard = Shard.load(slice_path)
+    print(f"Shard {os.path.basename(slice_path)} serving rows {shard.start}-{shard.stop} on {address}")
+    _serve(_parse_address(address), shard, authkey)
+
+
+def split_catalog(shard_count, slice_dir=SHARD_SLICE_DIR):
+    """Offline step: load the full matrix once and write the per-shard slices."""
+    import utils.data_manager as dm
+    dm.load_all_data(load_similarity=True)
+    if dm.similarity is None:
+        raise RuntimeError("similarity.pkl could not be loaded")
+    return write_slices(dm.similarity, dm.ratings, dm.votes, dm.years, shard_count, slice_dir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--local":
+        serve_local_shard(sys.argv[2], sys.argv[3], bytes.fromhex(os.getenv("SHARD_AUTHKEY", "")))
+    elif len(sys.argv) == 3 and sys.argv[1] == "--split":
+        for path in split_catalog(int(sys.argv[2])):
+            print(f"Wrote {path}")
+    elif len(sys.argv) == 3:
+        try:
+            key = require_authkey(os.getenv("SHARD_AUTHKEY", "").encode())
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        serve_shard(sys.argv[1], sys.argv[2], key)
+    else:
+        print("Usage: python -m utils.sharding --split <shard_count>")
+        print("       SHARD_AUTHKEY=<secret> python -m utils.sharding <host:port> <slice.npz>")
+        print("Bind to loopback or a private interface only.")
+        sys.exit(1)
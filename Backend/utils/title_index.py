@@ -0,0 +1,160 @@
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Prefixes up to this length match too many titles to rank per request, so
+# their top results are precomputed when the index is built
+SHORT_PREFIX_LEN = 3
+MAX_RESULTS = 20
+# Match ranges up to this size are ranked directly; larger ones go through the rank tree
+SMALL_RANGE = 256
+_NO_RANK = 2 ** 31 - 1
+# Ends each title in the joined key buffer; sorts before every normalized character
+_SEP = "\x00"
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+class TitleIndex:
+    """
+    Prefix index over normalized titles and every word-suffix of a title,
+    so "dark kn" and "knight" both find "The Dark Knight".
+
+    All normalized titles are joined into one string and a key is just the
+    offset of a word start in it, so the index holds no per-key strings.
+    Offsets are kept sorted by the key they point at and searched with
+    bisect; movie positions and vote ranks are compact int arrays. A
+    min-rank segment tree over the sorted keys returns the best-ranked
+    matches of any key range in O(limit * log n), however many titles
+    share the prefix.
+    """
+
+    def __init__(self, titles, vote_counts, max_results=MAX_RESULTS):
+        self.max_results = max_results
+
+        # rank[pos] = 0 for the most voted movie, 1 for the next, ...
+        by_votes = sorted(range(len(titles)), key=lambda pos: -vote_counts[pos])
+        self._rank = array("i", [0] * len(titles))
+        for rank, pos in enumerate(by_votes):
+            self._rank[pos] = rank
+
+        normalized = [normalize(title) for title in titles]
+        self._text = _SEP.join(normalized) + _SEP
+        starts = array("i")
+        # Keys grouped by their first characters, so sorting only ever
+        # materializes one group's key strings at a time
+        buckets = {}
+        offset = 0
+        for title in normalized:
+            starts.append(offset)
+            end = offset + len(title)
+            word = offset if title else -1
+            while word >= 0:
+                head = self._text[word:min(word + SHORT_PREFIX_LEN, end)]
+                buckets.setdefault(head, array("i")).append(word)
+                word = self._text.find(" ", word, end)
+                if word >= 0:
+                    word += 1
+            offset = end + 1
+        del normalized
+
+        self._offsets = array("i")
+        for head in sorted(buckets):
+            self._offsets.extend(sorted(buckets.pop(head), key=self._key))
+        self._positions = array("i", (bisect_right(starts, offset) - 1 for offset in self._offsets))
+
+        self._tree_size, self._tree = self._build_rank_tree()
+        self._short = self._build_short_prefixes()
+
+    def _key(self, offset):
+        return self._text[offset:self._text.index(_SEP, offset)]
+
+    def _key_prefix(self, length):
+        """Sort key for bisect: the first `length` characters of a key."""
+        text = self._text
+
+        def key(offset):
+            chunk = text[offset:offset + length]
+            end = chunk.find(_SEP)
+            return chunk if end < 0 else chunk[:end]
+        return key
+
+    def _range(self, prefix, lo=0):
+        """[lo, hi) slice of the sorted keys that start with `prefix`."""
+        key = self._key_prefix(len(prefix))
+        lo = bisect_left(self._offsets, prefix, lo, key=key)
+        return lo, bisect_right(self._offsets, prefix, lo, key=key)
+
+    def _build_short_prefixes(self):
+        # Each short prefix covers one contiguous run of the sorted keys
+        short = {}
+        for length in range(1, SHORT_PREFIX_LEN + 1):
+            key = self._key_prefix(length)
+            lo = 0
+            while lo < len(self._offsets):
+                prefix = key(self._offsets[lo])
+                hi = bisect_right(self._offsets, prefix, lo, key=key)
+                # Keys shorter than `length` form their own runs; they belong to shorter prefixes
+                if len(prefix) == length:
+                    short[prefix] = array("i", self._best_in_range(lo, hi, self.max_results))
+                lo = hi
+        return short
+
+    def _build_rank_tree(self):
+        size = 1
+        while size < max(len(self._offsets), 1):
+            size *= 2
+        tree = array("i", [_NO_RANK] * (2 * size))
+        for i, pos in enumerate(self._positions):
+            tree[size + i] = self._rank[pos]
+        for node in range(size - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+        return size, tree
+
+    def _best_in_range(self, lo, hi, limit):
+        """Best-ranked distinct positions among keys[lo:hi], by best-first search of the tree."""
+        size, tree = self._tree_size, self._tree
+        # (lower bound on rank, node, first key index, end key index)
+        heap = [(tree[1], 1, 0, size)]
+        results, seen = [], set()
+        while heap and len(results) < limit:
+            _, node, node_lo, node_hi = heapq.heappop(heap)
+            if node >= size:
+                pos = self._positions[node - size]
+                if pos not in seen:
+                    seen.add(pos)
+                    results.append(pos)
+                continue
+            mid = (node_lo + node_hi) // 2
+            for child, child_lo, child_hi in ((2 * node, node_lo, mid), (2 * node + 1, mid, node_hi)):
+                if child_lo < hi and child_hi > lo and tree[child] != _NO_RANK:
+                    heapq.heappush(heap, (tree[child], child, child_lo, child_hi))
+        return results
+
+    def search(self, query, limit=10):
+        """Row positions of titles matching `query` as a prefix, most voted first."""
+        prefix = normalize(query)
+        limit = min(limit, self.max_results)
+        if not prefix or limit <= 0:
+            return []
+
+        if len(prefix) <= SHORT_PREFIX_LEN:
+            return list(self._short.get(prefix, ()))[:limit]
+
+        lo, hi = self._range(prefix)
+        if hi - lo > SMALL_RANGE:
+            return self._best_in_range(lo, hi, limit)
+        positions = set(self._positions[lo:hi])
+        return heapq.nsmallest(limit, positions, key=self._rank.__getitem__)
+
+    def __len__(self):
+        return len(self._offsets)
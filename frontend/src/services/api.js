@@ -16,6 +16,9 @@ export const login = (email, password) =>
 export const getRecommendations = (movieName) =>
     api.get(`/recommend?movie=${encodeURIComponent(movieName)}`);
 
+export const searchMovies = (query, limit = 8) =>
+    api.get(`/movies/search?q=${encodeURIComponent(query)}&limit=${limit}`);
+
 export const getPopularMovies = () =>
     api.get('/movies/popular');
 